@@ -0,0 +1,185 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+import os
+import hashlib
+import pickle
+from pathlib import Path
+
+import htcondor
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "condor_necropsy"
+)
+
+# set this environment variable (to anything) to never read or write the cache
+DISABLE_ENV_VAR = "CONDOR_NECROPSY_NO_CACHE"
+
+# bump this whenever the layout of the cached records changes
+CACHE_VERSION = 1
+
+# the only event attributes that the rest of condor_necropsy ever reads
+PAYLOAD_KEYS = ("LogNotes", "MemoryUsage", "RunRemoteUsage", "Type")
+
+
+class CachedEvent:
+    """
+    A lightweight stand-in for :class:`htcondor.JobEvent` that only carries
+    the attributes listed in :data:`PAYLOAD_KEYS`.
+    """
+
+    __slots__ = ("cluster", "proc", "type", "timestamp", "_payload")
+
+    def __init__(self, cluster, proc, type, timestamp, payload):
+        self.cluster = cluster
+        self.proc = proc
+        self.type = type
+        self.timestamp = timestamp
+        self._payload = payload
+
+    def __getitem__(self, key):
+        return self._payload[key]
+
+    def get(self, key, default=None):
+        return self._payload.get(key, default)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.cluster}.{self.proc}, {self.type})"
+
+
+def enabled():
+    """Return whether the on-disk cache should be used."""
+    return DISABLE_ENV_VAR not in os.environ
+
+
+def cache_path(path) -> Path:
+    """
+    Return the cache file for an event log.
+    There is one file per log (and cache format), which is overwritten
+    whenever the log changes, so a growing log doesn't pile up stale copies.
+    """
+    path = Path(path).absolute()
+    key = hashlib.blake2b(
+        f"{CACHE_VERSION}:{','.join(PAYLOAD_KEYS)}:{path.as_posix()}".encode(),
+        digest_size=16,
+    ).hexdigest()
+
+    return CACHE_DIR / f"{key}.pkl"
+
+
+def _stamp(path):
+    stat = Path(path).stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def iter_records(path):
+    """
+    Read an event log with the HTCondor bindings and yield a compact
+    ``(cluster, proc, type, timestamp, payload)`` tuple for each event.
+    """
+    for event in htcondor.JobEventLog(Path(path).as_posix()).events(0):
+        payload = {}
+        for key in PAYLOAD_KEYS:
+            value = event.get(key, None)
+            if value is not None:
+                payload[key] = value
+
+        yield event.cluster, event.proc, int(event.type), event.timestamp, payload
+
+
+def parse(path):
+    """Return a list of the compact event records (see :func:`iter_records`)."""
+    return list(iter_records(path))
+
+
+def is_cached(path):
+    """Return whether the cache holds up-to-date records for an event log."""
+    if not enabled():
+        return False
+
+    try:
+        with cache_path(path).open(mode="rb") as f:
+            return pickle.load(f) == _stamp(path)
+    except Exception:
+        return False
+
+
+def load_records(path):
+    """
+    Return the compact event records (see :func:`iter_records`) for an event log,
+    reading them from the on-disk cache if the log has not changed since it
+    was last parsed.
+    """
+    if not enabled():
+        return parse(path)
+
+    cache_file = cache_path(path)
+    stamp = _stamp(path)
+
+    # the file holds the log's (mtime, size) stamp, then the records,
+    # so a stale file can be detected without loading the records
+    records = None
+    try:
+        with cache_file.open(mode="rb") as f:
+            if pickle.load(f) == stamp:
+                records = pickle.load(f)
+                logger.debug(f"Loaded events for {path} from cache file {cache_file}")
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.exception(f"Failed to load cache file {cache_file}, re-parsing")
+
+    if records is None:
+        records = parse(path)
+        _write_cache(cache_file, stamp, records)
+
+    return records
+
+
+def records_to_events(records):
+    """Lazily turn compact event records back into :class:`CachedEvent`."""
+    values = htcondor.JobEventType.values
+    for cluster, proc, type, timestamp, payload in records:
+        yield CachedEvent(cluster, proc, values[type], timestamp, payload)
+
+
+def load_or_parse(path):
+    """
+    Yield the events in an event log as :class:`CachedEvent`.
+    With the cache disabled, the events are streamed straight from the log,
+    without ever holding all of them in memory at once.
+    """
+    if not enabled():
+        return records_to_events(iter_records(path))
+
+    return records_to_events(load_records(path))
+
+
+def _write_cache(cache_file, stamp, records):
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open(mode="wb") as f:
+            pickle.dump(stamp, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+        logger.debug(f"Wrote cache file {cache_file}")
+    except OSError:
+        logger.exception(f"Failed to write cache file {cache_file}")
@@ -13,7 +13,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import itertools
 import logging
 import sys
 import random
@@ -22,25 +21,23 @@ import functools
 import click
 from click_didyoumean import DYMGroup
 
-from halo import Halo
-from spinners import Spinners
-
-import matplotlib.pyplot as plt
-
-from .events import get_events
-from .state_graph import make_state_graph
-from .stats import extract_data, make_summaries, SUMMARY_HEADERS
-from .utils import table
 from .version import version
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
-SPINNERS = list(name for name in Spinners.__members__ if name.startswith("dots"))
+# The heavy dependencies (halo, matplotlib, and, through our own modules,
+# htcondor, numpy, and pandas) are imported inside the commands that need
+# them, so that --help and version don't pay for them at startup.
 
 
 def make_spinner(*args, **kwargs):
-    return Halo(*args, spinner=random.choice(SPINNERS), stream=sys.stderr, **kwargs)
+    from halo import Halo
+    from spinners import Spinners
+
+    spinners = [name for name in Spinners.__members__ if name.startswith("dots")]
+
+    return Halo(*args, spinner=random.choice(spinners), stream=sys.stderr, **kwargs)
 
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
@@ -89,6 +86,9 @@ def version():
 @click.argument("logs", nargs=-1, type=click.Path(exists=True, resolve_path=True))
 def graph(logs):
     """Make a graph showing the status of the jobs in the logs over time."""
+    from .events import get_events
+    from .state_graph import make_state_graph
+
     with make_spinner("Processing events...") as spinner:
         graph = make_state_graph(get_events(*logs))
 
@@ -102,6 +102,10 @@ _HEADER_FMT = functools.partial(click.style, bold=True)
 @click.argument("logs", nargs=-1, type=click.Path(exists=True, resolve_path=True))
 def stats(logs):
     """Display summary statistics for a variety of metrics, like runtime and memory usage."""
+    from .events import get_events
+    from .stats import extract_data, make_summaries, SUMMARY_HEADERS
+    from .utils import table
+
     with make_spinner("Processing events...") as spinner:
         event_data = extract_data(get_events(*logs))
         stats = make_summaries(event_data)
@@ -121,19 +125,37 @@ def stats(logs):
 @click.option("--format", default="png")
 @click.option("--bins", type=int, default=10)
 def hist(logs, data, groupby, name, format, bins):
+    import numpy as np
+    import matplotlib.pyplot as plt
+
+    from .events import get_events
+    from .stats import extract_data
+    from .plots import plot_histograms
+
     with make_spinner("Processing events...") as spinner:
         df = extract_data(get_events(*logs)).as_dataframe()
         spinner.succeed("Processed events")
 
     with make_spinner(f"Making histogram for {data}...") as spinner:
-        hist = df.hist(column=data, by=groupby, sharex=True, sharey=True, bins=bins)
-        for ax in itertools.chain(*hist):
-            ax.set_xlabel(data)
-            ax.set_ylabel("Frequency")
-            ax.tick_params(labelleft=True, labelbottom=True)
+        values = df[data]
+        if values.dtype.kind == "m":
+            values = values.dt.total_seconds()
+        values = values.dropna()
+
+        if groupby is None:
+            groups = [(None, values)]
+        else:
+            groups = list(values.groupby(df[groupby]))
+            if not groups:
+                spinner.fail(f"No {data} values have a {groupby} to group by")
+                sys.exit(1)
+
+        edges = np.histogram_bin_edges(values.to_numpy(), bins=bins)
+        fig, axes = plot_histograms(groups, edges, xlabel=data, ylabel="Frequency")
+
         plt.tight_layout()
         plt.savefig(f"{name}.{format}")
-        plt.close()
+        plt.close(fig)
 
         spinner.succeed(f"Made histogram for {data}")
 
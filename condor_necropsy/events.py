@@ -15,14 +15,78 @@
 
 import logging
 
-from pathlib import Path
+import os
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-import htcondor
+from . import cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 
 def get_events(*event_log_paths):
-    for path in event_log_paths:
-        yield from htcondor.JobEventLog(Path(path).as_posix()).events(0)
+    """
+    Yield the events from all of the given event logs.
+    Each log's events come out in file order, and multiple logs are merged
+    by timestamp, so the result is only in timestamp order if every log is.
+    Callers that need timestamp order must sort the events themselves.
+    Several uncached logs may be parsed in parallel worker processes;
+    if the workers can't be used, the logs are parsed here instead.
+    """
+    if len(event_log_paths) <= 1:
+        for path in event_log_paths:
+            yield from cache.load_or_parse(path)
+        return
+
+    # only logs that have to be parsed from scratch are worth farming out;
+    # cached records load faster here than they could be shipped back
+    # from a worker process; with the cache disabled, every log is streamed
+    # instead, since workers would have to collect all of its records
+    records_per_log = {}
+    if cache.enabled():
+        uncached = [path for path in event_log_paths if not cache.is_cached(path)]
+        if len(uncached) > 1:
+            records_per_log = _parse_in_pool(uncached)
+
+    events_per_log = [
+        (
+            cache.records_to_events(records_per_log.pop(path))
+            if path in records_per_log
+            else cache.load_or_parse(path)
+        )
+        for path in event_log_paths
+    ]
+
+    yield from heapq.merge(*events_per_log, key=lambda e: e.timestamp)
+
+
+def _parse_in_pool(paths):
+    """
+    Parse event logs in worker processes, returning a dict of path to records.
+    The pool is only an optimisation: if it can't run, an empty dict is
+    returned and the caller parses the logs itself.
+    """
+    # don't fork, because callers may have other threads running (spinners);
+    # forkserver isn't available everywhere (Windows), but spawn is
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+    else:
+        context = multiprocessing.get_context("spawn")
+
+    # the logs are independent, so parse them in parallel; the workers hand
+    # back plain tuples because the event objects themselves don't pickle well
+    max_workers = min(len(paths), os.cpu_count() or 1)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            return dict(zip(paths, pool.map(cache.load_records, paths)))
+    except (BrokenProcessPool, OSError):
+        # e.g., a calling script without an if __name__ == "__main__" guard,
+        # whose workers die while re-importing it
+        logger.warning(
+            "Could not parse event logs in worker processes, parsing them serially",
+            exc_info=True,
+        )
+        return {}
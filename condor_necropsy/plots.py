@@ -0,0 +1,57 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+
+import math
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+def plot_histograms(groups, edges, xlabel, ylabel, **subplot_kw):
+    """
+    Draw one histogram per ``(name, values)`` group on a grid of subplots.
+    Every group is binned with the same ``edges``, so that the subplots
+    line up; a group named ``None`` gets no title.
+    Extra keyword arguments are passed to :func:`matplotlib.pyplot.subplots`.
+
+    Returns the figure and the (2-D) array of axes.
+    Raises :class:`ValueError` if there are no groups.
+    """
+    if not groups:
+        raise ValueError("There are no groups to plot histograms for.")
+
+    ncols = math.ceil(math.sqrt(len(groups)))
+    nrows = math.ceil(len(groups) / ncols)
+    fig, axes = plt.subplots(
+        nrows, ncols, sharex=True, sharey=True, squeeze=False, **subplot_kw
+    )
+
+    for ax, (name, values) in zip(axes.flat, groups):
+        counts, _ = np.histogram(np.asarray(values), bins=edges)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
+        if name is not None:
+            ax.set_title(name)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.tick_params(labelleft=True, labelbottom=True)
+    for ax in axes.flat[len(groups) :]:
+        ax.set_visible(False)
+
+    return fig, axes
@@ -16,13 +16,12 @@
 import logging
 
 import itertools
-import math
 import sys
-import collections
 import datetime
 import shutil
 
 import click
+import numpy as np
 
 from .status import JobStatus, JOB_EVENT_STATUS_TRANSITIONS
 
@@ -35,39 +34,58 @@ STATUS_TO_SYMBOL = dict(zip(JobStatus, SYMBOLS))
 COLORS = ["black", "yellow", "blue", "magenta", "green", "red", "magenta"]
 SYMBOL_TO_COLOR = dict(zip(SYMBOLS, COLORS))
 
+# ANSI escape codes, computed once instead of calling click.style per bar segment
+SYMBOL_TO_ANSI_PREFIX = {
+    symbol: click.style("", fg=color, reset=False)
+    for symbol, color in SYMBOL_TO_COLOR.items()
+}
+ANSI_RESET = click.style("", reset=True)
+
 
 def make_state_graph(events):
+    # logs are usually in timestamp order already (a concatenated log need
+    # not be), and sorting already-sorted input is a linear pass anyway
+    events = sorted(events, key=lambda e: e.timestamp)
+
+    # per event, only record which status a job entered and which it left
+    # (-1 for none); the job counts after every event are a cumulative sum
+    # over those changes, so we never copy the whole set of counts per event
+    timestamps = np.empty(len(events), dtype=np.int64)
+    new_statuses = np.full(len(events), -1, dtype=np.int8)
+    old_statuses = np.full(len(events), -1, dtype=np.int8)
+
     job_states = {}
-    job_state_counts = collections.Counter()
-    counts_over_time = []
 
-    for event in sorted(events, key=lambda e: e.timestamp):
-        event_key = (event.cluster, event.proc)
+    for idx, event in enumerate(events):
+        timestamps[idx] = event.timestamp
+
         new_status = JOB_EVENT_STATUS_TRANSITIONS.get(event.type, None)
+        if new_status is None:
+            continue
 
-        if new_status is not None:
-            old_status = job_states.get(event_key, None)
+        event_key = (event.cluster, event.proc)
+        old_status = job_states.get(event_key, None)
 
-            job_states[event_key] = new_status
-            job_state_counts[new_status] += 1
+        job_states[event_key] = new_status
+        new_statuses[idx] = new_status
 
-            if old_status is not None:
-                job_state_counts[old_status] -= 1
+        if old_status is not None:
+            old_statuses[idx] = old_status
 
-        counts_over_time.append((event.timestamp, job_state_counts.copy()))
+    counts = status_changes_to_counts(new_statuses, old_statuses)
 
     term = shutil.get_terminal_size((80, 20))
 
     width = term.columns - 10
     height = term.lines - 10
 
-    graph = make_bars(counts_over_time, width, height)
+    graph = make_bars(timestamps, counts, width, height)
 
     rows = ["│" + row for row in graph.splitlines()]
     rows.append("└" + ("─" * (width)))
 
-    first_time, _ = counts_over_time[0]
-    last_time, _ = counts_over_time[-1]
+    first_time = int(timestamps[0])
+    last_time = int(timestamps[-1])
 
     left_date_str = (
         datetime.datetime.fromtimestamp(first_time)
@@ -82,7 +100,7 @@ def make_state_graph(events):
     time_str = "Time".center(width + 1)
     rows.append(merge_strings(left_date_str, right_date_str, time_str))
 
-    max_jobs = max(total_counts(c) for _, c in counts_over_time)
+    max_jobs = counts.sum(axis=1).max()
 
     extra_len = max(len(str(max_jobs)), len("# Jobs"))
 
@@ -105,49 +123,62 @@ def make_state_graph(events):
 
 
 def merge_strings(*strings):
+    """Overlay the strings, keeping the first non-space character at each position."""
     max_len = max(len(s) for s in strings)
 
-    out = [" "] * max_len
-
+    # utf-32 gives exactly one fixed-width code unit per character
+    out = np.full(max_len, ord(" "), dtype=np.uint32)
     for string in strings:
-        for idx, char in enumerate(string):
-            if out[idx] == " " and char != " ":
-                out[idx] = char
+        chars = np.frombuffer(string.ljust(max_len).encode("utf-32-le"), np.uint32)
+        out = np.where(out == ord(" "), chars, out)
 
-    return "".join(out)
+    return out.tobytes().decode("utf-32-le")
 
 
-def make_bars(counts_over_time, width, height):
-    first_time, _ = counts_over_time[0]
-    last_time, last_counts = counts_over_time[-1]
+def make_bars(timestamps, counts, width, height):
+    groups = group_counts_by_time(timestamps, width)
+    lefts, rights = groups[:, 0], groups[:, 1]
 
-    groups = list(group_counts_by_time(counts_over_time, width))
-    counts = [avg_counts(group) for group in groups]
-    counts[0] = groups[0][-1][1]
-    counts[-1] = last_counts
+    # running totals turn the sum over every bucket into a single subtraction
+    running_counts = np.zeros((len(counts) + 1, counts.shape[1]), dtype=np.int64)
+    np.cumsum(counts, axis=0, out=running_counts[1:])
+    bucket_sizes = rights - lefts
+    bucket_counts = (running_counts[rights] - running_counts[lefts]) / np.maximum(
+        bucket_sizes, 1
+    )[:, np.newaxis]
 
-    max_jobs = max(total_counts(c) for c in counts if c is not None)
-    columns = []
-    for count in counts:
-        if count is None:
-            columns.append(columns[-1])
-            continue
+    bucket_counts[0] = counts[rights[0] - 1]
+    bucket_counts[-1] = counts[-1]
 
-        bar_lens = calculate_column_partition(count, max_jobs, height)
-        columns.append(
-            "".join(
-                symbol * bar_lens[status] for status, symbol in STATUS_TO_SYMBOL.items()
-            )
-        )
+    # empty buckets just repeat the previous column
+    filled = bucket_sizes > 0
+    filled[[0, -1]] = True
+    bucket_counts = bucket_counts[
+        np.maximum.accumulate(np.where(filled, np.arange(len(filled)), 0))
+    ]
 
-    rows = list(
-        reversed(list(map(list, itertools.zip_longest(*columns, fillvalue=" "))))
-    )
+    max_jobs = bucket_counts.sum(axis=1).max()
+    bar_lens = calculate_column_partition(bucket_counts, max_jobs, height)
+
+    # lay the bars out directly in a grid of ASCII codes, bottom row first
+    # (a bar shrunk below zero by the rounding carry is simply not drawn)
+    bar_lens = np.maximum(bar_lens, 0)
+    tops = bar_lens.cumsum(axis=1)
+    bottoms = tops - bar_lens
+    heights = np.arange(tops[:, -1].max())[:, np.newaxis]
+
+    grid = np.full((len(heights), len(bar_lens)), ord(" "), dtype=np.uint8)
+    for status, symbol in STATUS_TO_SYMBOL.items():
+        in_bar = (heights >= bottoms[:, status]) & (heights < tops[:, status])
+        grid[in_bar] = ord(symbol)
+
+    rows = [bytes(row).decode("ascii") for row in grid[::-1]]
     rows = [
         "".join(
-            click.style("█" * len(list(group)), fg=SYMBOL_TO_COLOR[symbol])
+            SYMBOL_TO_ANSI_PREFIX[symbol] + ("█" * len(list(group)))
             for symbol, group in itertools.groupby(row)
         )
+        + ANSI_RESET
         for row in rows
     ]
 
@@ -155,28 +186,27 @@ def make_bars(counts_over_time, width, height):
 
 
 def calculate_column_partition(counts, max_jobs, height):
-    raw_split = [(counts.get(status, 0) / max_jobs) * height for status in JobStatus]
-
-    int_split = [0 for _ in range(len(raw_split))]
-    carry = 0
-    for idx, entry in enumerate(raw_split):
-        dec = entry - math.floor(entry)
-
-        if entry == 0:
-            int_split[idx] = 0
-        elif dec >= 0.5:
-            int_split[idx] = math.ceil(entry)
-        elif math.floor(entry) == 0:
-            int_split[idx] = 1
-            carry += 1
-        elif dec < 0.5:
-            int_split[idx] = math.floor(entry)
-        else:
-            raise Exception("Unreachable")
+    """
+    Split each column of the graph between the job statuses.
+
+    ``counts`` is a ``(columns, len(JobStatus))`` matrix; the return value is
+    an integer matrix of the same shape holding the bar length for each
+    status in each column.
+    """
+    raw_split = (counts / max_jobs) * height
+
+    floor = np.floor(raw_split)
+    rounded = np.where(raw_split - floor >= 0.5, np.ceil(raw_split), floor)
+    int_split = rounded.astype(np.int32)
 
-    int_split[int_split.index(max(int_split))] -= carry
+    # statuses that would round down to nothing still get a single cell,
+    # which is taken back from the largest bar in that column
+    too_small = (raw_split > 0) & (raw_split < 0.5)
+    int_split[too_small] = 1
+    carry = too_small.sum(axis=1)
+    int_split[np.arange(len(int_split)), int_split.argmax(axis=1)] -= carry
 
-    return {k: v for k, v in zip(JobStatus, int_split)}
+    return int_split
 
 
 def _calculate_bar_component_len(count, total, bar_width):
@@ -186,41 +216,30 @@ def _calculate_bar_component_len(count, total, bar_width):
     return max(int((count / total) * bar_width), 1)
 
 
-def total_counts(counter):
-    return sum(counter.values())
+def status_changes_to_counts(new_statuses, old_statuses):
+    """
+    Return an ``(events, len(JobStatus))`` matrix of the number of jobs in
+    each status after each event.
+    """
+    changes = np.zeros((len(new_statuses), len(JobStatus)), dtype=np.int32)
+    rows = np.arange(len(new_statuses))
 
+    entered = new_statuses >= 0
+    np.add.at(changes, (rows[entered], new_statuses[entered]), 1)
 
-def group_counts_by_time(counts_over_time, n_divisions):
-    first_time, _ = counts_over_time[0]
-    last_time, _ = counts_over_time[-1]
+    left = old_statuses >= 0
+    np.add.at(changes, (rows[left], old_statuses[left]), -1)
 
-    dt = (last_time - first_time) / n_divisions
+    return changes.cumsum(axis=0, dtype=np.int32)
 
-    left_idx = 0
-    right_idx = 0
-    for left_time in (first_time + (n * dt) for n in range(n_divisions)):
-        right_time = left_time + dt
 
-        for right_idx, (timestamp, _) in enumerate(
-            counts_over_time[left_idx:], start=left_idx
-        ):
-            if timestamp > right_time:
-                break
+def group_counts_by_time(timestamps, n_divisions):
+    """Return ``(left, right)`` index bounds that split the timestamps into time buckets."""
+    right_times = np.linspace(timestamps[0], timestamps[-1], n_divisions + 1)[1:]
+    right_idxs = np.searchsorted(timestamps, right_times, side="right")
+    left_idxs = np.concatenate(([0], right_idxs[:-1]))
 
-        yield counts_over_time[left_idx:right_idx]
-        left_idx = right_idx
-
-
-def avg_counts(counts_over_time):
-    lc = len(counts_over_time)
-    if lc == 0:
-        return None
-
-    counts = [counts for _, counts in counts_over_time]
-
-    return collections.Counter(
-        {k: v / lc for k, v in sum(counts, collections.Counter()).items()}
-    )
+    return np.column_stack((left_idxs, right_idxs))
 
 
 if __name__ == "__main__":
@@ -15,10 +15,13 @@
 
 import logging
 
-import math
+import array
 import datetime
 import enum
+import math
+import re
 
+import numpy as np
 import pandas as pd
 
 import htcondor
@@ -29,10 +32,17 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
 SUMMARY_HEADERS = ["Statistic", "Mean", "5%", "25%", "Median", "75%", "95%"]
+SUMMARY_QUANTILES = {"5%": 0.05, "25%": 0.25, "Median": 0.5, "75%": 0.75, "95%": 0.95}
+_SUMMARY_PERCENTILES = np.array(list(SUMMARY_QUANTILES.values()))
 
+_RUNTIME_RE = re.compile(r"Usr (\d+) (\d+):(\d+):(\d+), Sys (\d+) (\d+):(\d+):(\d+)")
 
-def chop_microseconds(delta):
-    return delta - datetime.timedelta(microseconds=delta.microseconds)
+
+def seconds_to_timedelta(seconds):
+    """Return a (non-negative) number of seconds as a whole-second timedelta."""
+    # round away float error from quantile interpolation (90054.99999999996
+    # should be 90055) at microsecond precision before dropping the fraction
+    return datetime.timedelta(seconds=math.floor(round(seconds, 6)))
 
 
 COLUMNS = [
@@ -47,10 +57,33 @@ COLUMNS = [
     "transfer_output_time",
 ]
 
+# the columns that hold durations, in seconds
+TIME_COLUMNS = {
+    "runtime",
+    "time_to_first_start",
+    "transfer_output_queue_time",
+    "transfer_input_queue_time",
+    "transfer_input_time",
+    "transfer_output_time",
+}
+
+
+# marks a job that has no value for an attribute; it is the same bit pattern
+# as NaT, so duration arrays with gaps can be viewed as timedeltas directly
+MISSING = np.iinfo(np.int64).min
+
 
 class EventData:
+    """
+    Per-job data extracted from an event log, stored column-wise:
+    each attribute is an array with one entry per job in ``jobs``
+    (a sorted ``(cluster, proc)`` index), with :data:`MISSING`
+    (or ``None`` for ``note``) where a job has no value.
+    """
+
     def __init__(
         self,
+        jobs,
         submitted_at,
         note,
         runtime,
@@ -61,6 +94,7 @@ class EventData:
         transfer_input_time,
         transfer_output_time,
     ):
+        self.jobs = jobs
         self.submitted_at = submitted_at
         self.note = note
         self.runtime = runtime
@@ -72,110 +106,217 @@ class EventData:
         self.transfer_output_time = transfer_output_time
 
     def as_dataframe(self):
-        rows = [
-            (key[0], key[1], *(getattr(self, col).get(key, None) for col in COLUMNS))
-            for key in sorted(self.submitted_at.keys())
-        ]
+        # only jobs that we saw get submitted make it into the dataframe
+        submitted = self.submitted_at != MISSING
 
-        df = pd.DataFrame.from_records(
-            data=rows, columns=["cluster", "proc"] + COLUMNS, index=["cluster", "proc"]
-        )
+        # durations are int64 seconds with NaT-compatible gaps,
+        # so they can be viewed as timedeltas without copying
+        columns = {}
+        for col in COLUMNS:
+            values = getattr(self, col)[submitted]
+            if col in TIME_COLUMNS:
+                values = values.view("timedelta64[s]")
+            elif values.dtype == np.int64 and (values == MISSING).any():
+                values = np.where(values == MISSING, np.nan, values)
+            columns[col] = values
 
-        for col in df:
-            if "time" in col:
-                df[col] = df[col].astype("timedelta64[s]")
+        return pd.DataFrame(columns, index=self.jobs[submitted])
 
-        return df
 
+class TransferEventType(enum.IntEnum):
+    INPUT_TRANSFER_QUEUED = 1
+    INPUT_TRANSFER_STARTED = 2
+    INPUT_TRANSFER_FINISHED = 3
+    OUTPUT_TRANSFER_QUEUED = 4
+    OUTPUT_TRANSFER_STARTED = 5
+    OUTPUT_TRANSFER_FINISHED = 6
 
-def extract_data(events):
-    submitted_at = {}
-    time_to_first_start = {}
-    runtime = {}
-    memory_usage = {}
-    transfer_input_queued = {}
-    transfer_input_queue_time = {}
-    transfer_input_start = {}
-    transfer_input_time = {}
-    transfer_output_queued = {}
-    transfer_output_queue_time = {}
-    transfer_output_start = {}
-    transfer_output_time = {}
-    note = {}
+
+_KEY = ["cluster", "proc"]
+
+_SUBMIT = int(htcondor.JobEventType.SUBMIT)
+_EXECUTE = int(htcondor.JobEventType.EXECUTE)
+_IMAGE_SIZE = int(htcondor.JobEventType.IMAGE_SIZE)
+_FILE_TRANSFER = int(htcondor.JobEventType.FILE_TRANSFER)
+_JOB_TERMINATED = int(htcondor.JobEventType.JOB_TERMINATED)
+
+# the event types that we look at, with their integer codes
+# and the one attribute we need from each
+_PAYLOAD_KEYS = {
+    htcondor.JobEventType.SUBMIT: (_SUBMIT, "LogNotes"),
+    htcondor.JobEventType.EXECUTE: (_EXECUTE, None),
+    htcondor.JobEventType.IMAGE_SIZE: (_IMAGE_SIZE, "MemoryUsage"),
+    htcondor.JobEventType.FILE_TRANSFER: (_FILE_TRANSFER, "Type"),
+    htcondor.JobEventType.JOB_TERMINATED: (_JOB_TERMINATED, "RunRemoteUsage"),
+}
+
+
+def _events_to_dataframe(events):
+    """
+    Collect the events we care about into a DataFrame with one row per event,
+    in the order the events were seen (the ``seq`` column).
+    The events are consumed one at a time and only the fields we need are
+    kept, packed into typed buffers, so any iterable of events works.
+    """
+    clusters = array.array("q")
+    procs = array.array("q")
+    types = array.array("q")
+    timestamps = array.array("q")
+    payloads = []
+
+    append_cluster = clusters.append
+    append_proc = procs.append
+    append_type = types.append
+    append_timestamp = timestamps.append
+    append_payload = payloads.append
+    # one dict probe per event both filters the event and fetches
+    # everything we need to know about its type
+    lookup = _PAYLOAD_KEYS.get
 
     for event in events:
-        key = (event.cluster, event.proc)
-
-        if event.type is htcondor.JobEventType.SUBMIT:
-            submitted_at[key] = event.timestamp
-            note[key] = event.get("LogNotes", None)
-
-        elif event.type is htcondor.JobEventType.EXECUTE:
-            if key not in time_to_first_start:
-                time_to_first_start[key] = datetime.timedelta(
-                    seconds=event.timestamp - submitted_at[key]
-                )
-
-        elif event.type is htcondor.JobEventType.IMAGE_SIZE:
-            memory_usage[key] = max(
-                memory_usage.get(key, 0), int(event["MemoryUsage"]) * (1024 ** 2)
-            )
-
-        elif event.type is htcondor.JobEventType.FILE_TRANSFER:
-            transfer_event_type = TransferEventType(event["Type"])
-
-            if transfer_event_type is TransferEventType.INPUT_TRANSFER_QUEUED:
-                transfer_input_queued[key] = event.timestamp
-            elif transfer_event_type is TransferEventType.INPUT_TRANSFER_STARTED:
-                transfer_input_start[key] = event.timestamp
-                transfer_input_queue_time[key] = datetime.timedelta(
-                    seconds=event.timestamp
-                    - transfer_input_queued.get(key, event.timestamp)
-                )
-            elif transfer_event_type is TransferEventType.INPUT_TRANSFER_FINISHED:
-                transfer_input_time[key] = datetime.timedelta(
-                    seconds=event.timestamp - transfer_input_start[key]
-                )
-            elif transfer_event_type is TransferEventType.OUTPUT_TRANSFER_QUEUED:
-                transfer_output_queued[key] = event.timestamp
-            elif transfer_event_type is TransferEventType.OUTPUT_TRANSFER_STARTED:
-                transfer_output_start[key] = event.timestamp
-                transfer_output_queue_time[key] = datetime.timedelta(
-                    seconds=event.timestamp
-                    - transfer_output_queued.get(key, event.timestamp)
-                )
-            elif transfer_event_type is TransferEventType.OUTPUT_TRANSFER_FINISHED:
-                try:
-                    transfer_output_time[key] = datetime.timedelta(
-                        seconds=event.timestamp - transfer_output_start[key]
-                    )
-                except KeyError:
-                    pass
-
-        elif event.type is htcondor.JobEventType.JOB_TERMINATED:
-            runtime[key] = parse_runtime(event["RunRemoteUsage"])
+        entry = lookup(event.type)
+        if entry is None:
+            continue
+
+        type_, payload_key = entry
+        append_cluster(event.cluster)
+        append_proc(event.proc)
+        append_type(type_)
+        append_timestamp(event.timestamp)
+        append_payload(None if payload_key is None else event.get(payload_key, None))
+
+    return pd.DataFrame(
+        {
+            "cluster": np.frombuffer(clusters, dtype=np.int64),
+            "proc": np.frombuffer(procs, dtype=np.int64),
+            "type": np.frombuffer(types, dtype=np.int64),
+            "timestamp": np.frombuffer(timestamps, dtype=np.int64),
+            "payload": pd.Series(payloads, dtype=object),
+            "seq": np.arange(len(payloads)),
+        }
+    )
 
-    return EventData(
+
+def _last_per_job(df):
+    return df.drop_duplicates(_KEY, keep="last").set_index(_KEY)
+
+
+def _time_since(later, earlier, missing_is_zero=False):
+    """
+    For each of the ``later`` events, find the time since the most recent
+    ``earlier`` event for the same job, and return the value from the last
+    of the ``later`` events for each job.
+    If ``missing_is_zero``, a ``later`` event with no ``earlier`` event counts
+    as zero time; otherwise it is dropped.
+    """
+    merged = pd.merge_asof(
+        later[["seq", "cluster", "proc", "timestamp"]],
+        earlier[["seq", "cluster", "proc", "timestamp"]].rename(
+            columns={"timestamp": "earlier_timestamp"}
+        ),
+        on="seq",
+        by=_KEY,
+    )
+
+    if missing_is_zero:
+        merged["earlier_timestamp"] = merged["earlier_timestamp"].fillna(
+            merged["timestamp"]
+        )
+    else:
+        merged = merged.dropna(subset=["earlier_timestamp"])
+
+    merged["elapsed"] = merged["timestamp"] - merged["earlier_timestamp"]
+
+    return _last_per_job(merged)["elapsed"].astype("int64")
+
+
+def _job_index(indexes):
+    """
+    Return the sorted union of some ``(cluster, proc)`` indexes,
+    sorting plain integer arrays instead of Python tuples.
+    """
+    clusters = np.concatenate(
+        [index.get_level_values("cluster").to_numpy(np.int64) for index in indexes]
+    )
+    procs = np.concatenate(
+        [index.get_level_values("proc").to_numpy(np.int64) for index in indexes]
+    )
+
+    order = np.lexsort((procs, clusters))
+    clusters = clusters[order]
+    procs = procs[order]
+
+    # after sorting, duplicates are next to each other
+    first = np.ones(len(clusters), dtype=bool)
+    first[1:] = (clusters[1:] != clusters[:-1]) | (procs[1:] != procs[:-1])
+
+    return pd.MultiIndex.from_arrays([clusters[first], procs[first]], names=_KEY)
+
+
+def extract_data(events):
+    # where a job has several events of the same kind (evictions, restarted
+    # transfers, ...), the value from its last one wins
+    df = _events_to_dataframe(events)
+    types = df["type"]
+
+    submits = _last_per_job(df[types == _SUBMIT])
+    submitted_at = submits["timestamp"]
+    note = submits["payload"].infer_objects()
+
+    first_executes = df[types == _EXECUTE].groupby(_KEY)["timestamp"].min()
+    time_to_first_start = (first_executes - submitted_at).dropna().astype("int64")
+
+    image_sizes = df[types == _IMAGE_SIZE].dropna(subset=["payload"])
+    image_sizes = image_sizes.assign(memory=image_sizes["payload"].astype("int64"))
+    memory_usage = image_sizes.groupby(_KEY)["memory"].max() * (1024 ** 2)
+
+    transfers = df[types == _FILE_TRANSFER]
+    stages = transfers["payload"].astype("int64")
+    input_queued = transfers[stages == TransferEventType.INPUT_TRANSFER_QUEUED]
+    input_started = transfers[stages == TransferEventType.INPUT_TRANSFER_STARTED]
+    input_finished = transfers[stages == TransferEventType.INPUT_TRANSFER_FINISHED]
+    output_queued = transfers[stages == TransferEventType.OUTPUT_TRANSFER_QUEUED]
+    output_started = transfers[stages == TransferEventType.OUTPUT_TRANSFER_STARTED]
+    output_finished = transfers[stages == TransferEventType.OUTPUT_TRANSFER_FINISHED]
+
+    runtime = parse_runtimes(_last_per_job(df[types == _JOB_TERMINATED])["payload"])
+
+    columns = dict(
         submitted_at=submitted_at,
-        note=note,
         runtime=runtime,
         memory_usage=memory_usage,
         time_to_first_start=time_to_first_start,
-        transfer_input_queue_time=transfer_input_queue_time,
-        transfer_output_queue_time=transfer_output_queue_time,
-        transfer_input_time=transfer_input_time,
-        transfer_output_time=transfer_output_time,
+        transfer_input_queue_time=_time_since(
+            input_started, input_queued, missing_is_zero=True
+        ),
+        transfer_output_queue_time=_time_since(
+            output_started, output_queued, missing_is_zero=True
+        ),
+        transfer_input_time=_time_since(input_finished, input_started),
+        transfer_output_time=_time_since(output_finished, output_started),
+    )
+
+    # every job that shows up in any column gets a slot
+    jobs = _job_index([series.index for series in columns.values()])
+
+    return EventData(
+        jobs=jobs,
+        note=note.reindex(jobs).to_numpy(dtype=object, na_value=None),
+        **{
+            name: series.reindex(jobs, fill_value=MISSING).to_numpy(dtype=np.int64)
+            for name, series in columns.items()
+        },
     )
 
 
 def make_summaries(event_data):
     runtime_summary = make_summary(
-        event_data.runtime, "Runtime", post_process=chop_microseconds
+        event_data.runtime, "Runtime", post_process=seconds_to_timedelta
     )
     time_to_first_start_summary = make_summary(
         event_data.time_to_first_start,
         "Time to First Start",
-        post_process=chop_microseconds,
+        post_process=seconds_to_timedelta,
     )
     memory_usage_summary = make_summary(
         event_data.memory_usage, "Memory Usage", post_process=utils.num_bytes_to_str
@@ -183,22 +324,22 @@ def make_summaries(event_data):
     transfer_input_summary = make_summary(
         event_data.transfer_input_time,
         "Input Transfer Time",
-        post_process=chop_microseconds,
+        post_process=seconds_to_timedelta,
     )
     transfer_output_summary = make_summary(
         event_data.transfer_output_time,
         "Output Transfer Time",
-        post_process=chop_microseconds,
+        post_process=seconds_to_timedelta,
     )
     transfer_input_queue_summary = make_summary(
         event_data.transfer_input_queue_time,
         "Input Transfer Queue",
-        post_process=chop_microseconds,
+        post_process=seconds_to_timedelta,
     )
     transfer_output_queue_summary = make_summary(
         event_data.transfer_output_queue_time,
         "Output Transfer Queue",
-        post_process=chop_microseconds,
+        post_process=seconds_to_timedelta,
     )
 
     return (
@@ -212,27 +353,16 @@ def make_summaries(event_data):
     )
 
 
-class TransferEventType(enum.IntEnum):
-    INPUT_TRANSFER_QUEUED = 1
-    INPUT_TRANSFER_STARTED = 2
-    INPUT_TRANSFER_FINISHED = 3
-    OUTPUT_TRANSFER_QUEUED = 4
-    OUTPUT_TRANSFER_STARTED = 5
-    OUTPUT_TRANSFER_FINISHED = 6
-
-
 def make_summary(data, name, post_process=None):
     if post_process is None:
         post_process = lambda x: x
 
-    type_ = type(next(iter(data.values())))
+    arr = _prepare(data)
+    quantiles = np.quantile(arr, _SUMMARY_PERCENTILES)
+
     summary = {
-        "Mean": sum(data.values(), type_()) / len(data),
-        "5%": percentile(data.values(), 0.05),
-        "25%": percentile(data.values(), 0.25),
-        "Median": percentile(data.values(), 0.5),
-        "75%": percentile(data.values(), 0.75),
-        "95%": percentile(data.values(), 0.95),
+        "Mean": float(arr.mean()),
+        **{header: float(q) for header, q in zip(SUMMARY_QUANTILES, quantiles)},
     }
 
     summary = {k: post_process(v) for k, v in summary.items()}
@@ -241,35 +371,20 @@ def make_summary(data, name, post_process=None):
     return summary
 
 
-def parse_runtime(runtime_string: str) -> datetime.timedelta:
-    (_, usr_days, usr_hms), (_, sys_days, sys_hms) = [
-        s.split() for s in runtime_string.split(",")
-    ]
-
-    usr_h, usr_m, usr_s = usr_hms.split(":")
-    sys_h, sys_m, sys_s = sys_hms.split(":")
-
-    usr_time = datetime.timedelta(
-        days=int(usr_days), hours=int(usr_h), minutes=int(usr_m), seconds=int(usr_s)
-    )
-    sys_time = datetime.timedelta(
-        days=int(sys_days), hours=int(sys_h), minutes=int(sys_m), seconds=int(sys_s)
-    )
-
-    return usr_time + sys_time
-
+def _prepare(data):
+    """
+    Return the values for a statistic as a sorted float64 array,
+    leaving out the jobs that don't have a value.
+    """
+    data = np.asarray(data)
+    return np.sort(data[data != MISSING].astype(np.float64))
 
-def percentile(values, percentile, key=None):
-    if key is None:
-        key = lambda x: x
 
-    values = sorted(values, key=key)
+def parse_runtimes(runtime_strings: pd.Series) -> pd.Series:
+    """Return the total (user + system) number of seconds in each usage string."""
+    fields = runtime_strings.str.extract(_RUNTIME_RE).astype("int64").to_numpy()
+    # columns are days, hours, minutes, seconds for user time, then system time
+    days_hms = fields[:, :4] + fields[:, 4:]
+    seconds = days_hms @ np.array([86400, 3600, 60, 1], dtype=np.int64)
 
-    k = (len(values) - 1) * percentile
-    f = math.floor(k)
-    c = math.ceil(k)
-    if f == c:
-        return key(values[int(k)])
-    lower = key(values[int(f)]) * (c - k)
-    upper = key(values[int(c)]) * (k - f)
-    return lower + upper
+    return pd.Series(seconds, index=runtime_strings.index)
@@ -10,6 +10,7 @@ def table(headers, rows, fill="", header_fmt=None, row_fmt=None, alignment=None)
         The entries for each row, for each column.
         Should be an iterable of iterables or mappings, with the outer level containing the rows,
         and each inner iterable containing the entries for each column.
+        All of the rows must be the same kind (all iterables or all mappings).
         An iterable-type row is printed in order.
         A mapping-type row uses the headers as keys to align the stdout and can have missing values,
         which are filled using the ```fill`` value.
@@ -41,28 +42,32 @@ def table(headers, rows, fill="", header_fmt=None, row_fmt=None, alignment=None)
 
     align_methods = [alignment.get(h, "center") for h in headers]
 
-    processed_rows = []
-    for row in rows:
-        if isinstance(row, dict):
-            processed_rows.append([str(row.get(key, fill)) for key in headers])
-        else:
-            processed_rows.append([str(entry) for entry in row])
+    # rows are all mappings or all iterables, so only look at the first one
+    rows = list(rows)
+    if rows and isinstance(rows[0], dict):
+        processed_rows = [[str(row.get(key, fill)) for key in headers] for row in rows]
+    else:
+        processed_rows = [[str(entry) for entry in row] for row in rows]
 
-    for row in processed_rows:
-        lengths = [max(curr, len(entry)) for curr, entry in zip(lengths, row)]
+    # lay the table out column by column, so that each column's width and
+    # alignment method are looked up once instead of once per cell
+    columns = list(zip(*processed_rows))
+    lengths = [
+        max(length, *map(len, column)) for length, column in zip(lengths, columns)
+    ] + lengths[len(columns) :]
+    align_methods = [getattr(str, a) for a in align_methods]
 
     header = header_fmt(
         "  ".join(
-            getattr(h, a)(l) for h, l, a in zip(headers, lengths, align_methods)
+            align(h, l) for h, l, align in zip(headers, lengths, align_methods)
         ).rstrip()
     )
 
-    lines = (
-        row_fmt(
-            "  ".join(getattr(f, a)(l) for f, l, a in zip(row, lengths, align_methods))
-        )
-        for row in processed_rows
-    )
+    aligned_columns = [
+        [align(entry, length) for entry in column]
+        for column, length, align in zip(columns, lengths, align_methods)
+    ]
+    lines = (row_fmt("  ".join(row)) for row in zip(*aligned_columns))
 
     output = "\n".join((header, *lines))
 
@@ -79,10 +84,11 @@ class rstr(str):
         return self.__str__()
 
 
+BYTE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
 def num_bytes_to_str(num_bytes):
     """Return a number of bytes as a human-readable string."""
-    for unit in ("B", "KB", "MB", "GB"):
-        if num_bytes < 1024:
-            return "{:.1f} {}".format(num_bytes, unit)
-        num_bytes /= 1024
-    return "{:.1f} TB".format(num_bytes)
+    # bit_length is a cheap integer log2; every 10 bits is another factor of 1024
+    exponent = min(max(int(num_bytes).bit_length() - 1, 0) // 10, len(BYTE_UNITS) - 1)
+    return "{:.1f} {}".format(num_bytes / (1 << (10 * exponent)), BYTE_UNITS[exponent])
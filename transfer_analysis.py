@@ -1,4 +1,4 @@
-import itertools
+import functools
 
 import pandas
 import numpy as np
@@ -6,64 +6,58 @@ import matplotlib.pyplot as plt
 
 
 from condor_necropsy import stats
+from condor_necropsy.plots import plot_histograms
 from condor_necropsy.events import get_events
 
-data = stats.extract_data(get_events("combined.log"))
-
-df = data.as_dataframe()
-
 MB = 1024 ** 2
 GB = 1024 ** 3
 
-input_size = 50 * GB
-df["transfer_input_rate"] = (input_size / MB) / df["transfer_input_time"]
-df["Facility"] = df["note"]
-
-
-def q05(x):
-    return x.quantile(0.05)
-
-
-def q25(x):
-    return x.quantile(0.25)
-
+QUANTILES = {"q05": 0.05, "q25": 0.25, "q50": 0.50, "q75": 0.75, "q95": 0.95}
+NUM_BINS = 20
 
-def q50(x):
-    return x.quantile(0.50)
 
+@functools.lru_cache(maxsize=None)
+def load_df(log_path):
+    # get_events already caches the parsed events on disk, keyed on the log's
+    # mtime and size, so this only has to avoid redoing work within a process
+    return stats.extract_data(get_events(log_path)).as_dataframe()
 
-def q75(x):
-    return x.quantile(0.75)
 
+def analyze(log_path, input_size_gb, out_png):
+    df = load_df(log_path).copy()
 
-def q95(x):
-    return x.quantile(0.95)
+    input_size = input_size_gb * GB
+    transfer_input_seconds = df["transfer_input_time"].dt.total_seconds().to_numpy()
+    df["transfer_input_rate"] = (input_size / MB) / transfer_input_seconds
+    df["Facility"] = df["note"]
 
+    grouped_rates = df.groupby("Facility")["transfer_input_rate"]
+    summary = grouped_rates.quantile(list(QUANTILES.values())).unstack()
+    summary.columns = list(QUANTILES)
+    summary.insert(0, "mean", grouped_rates.mean())
+    print(pandas.concat({"transfer_input_rate": summary}, axis=1).round(1))
 
-f = {"transfer_input_rate": ["mean", q05, q25, q50, q75, q95]}
-grouped_rates = df.groupby("Facility")
-print(grouped_rates.agg(f).round(1))
+    rates = df["transfer_input_rate"].dropna()
+    edges = np.linspace(0, rates.to_numpy().max(), NUM_BINS)
 
-max_rate = df["transfer_input_rate"].max()
-num_bins = 20
+    fig, axes = plot_histograms(
+        list(rates.groupby(df["note"])),
+        edges,
+        xlabel="Input Transfer Rate (MB/s)",
+        ylabel="# of Occurrences",
+        figsize=(8, 8),
+    )
+    plt.suptitle(
+        f"Transfer Rate Histograms for {int(len(df) / 4)} Test Runs per Facility",
+        y=1.0,
+    )
+    for ax in axes.flat:
+        ax.set_xlim(0, None)
 
-hist = df.hist(
-    column="transfer_input_rate",
-    by="note",
-    sharex=True,
-    sharey=True,
-    bins=np.linspace(0, max_rate, num_bins),
-    figsize=(8, 8),
-)
+    plt.tight_layout()
+    plt.savefig(out_png)
+    plt.close(fig)
 
-plt.suptitle(
-    f"Transfer Rate Histograms for {int(len(df) / 4)} Test Runs per Facility", y=1.0
-)
-for ax in itertools.chain(*hist):
-    ax.set_xlabel("Input Transfer Rate (MB/s)")
-    ax.set_ylabel("# of Occurrences")
-    ax.tick_params(labelleft=True, labelbottom=True)
-    ax.set_xlim(0, None)
 
-plt.tight_layout()
-plt.savefig("transfer_input_rate.png")
+if __name__ == "__main__":
+    analyze("combined.log", input_size_gb=50, out_png="transfer_input_rate.png")